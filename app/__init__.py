@@ -51,6 +51,8 @@ def create_app(config_class=Config):
     # (V5 新结构) 注册 CLI 命令
     from . import commands
     app.cli.add_command(commands.init_db_command)
+    # (V7 新功能) 刷新分析快照
+    app.cli.add_command(commands.refresh_analytics_command)
 
     return app
 
@@ -0,0 +1,167 @@
+import os
+import tempfile
+import time
+import zipfile
+import zlib
+import numpy as np
+from flask import current_app
+from sqlalchemy import select
+from . import db
+from .models import User, Major, StudentInfo, AuditLog
+
+# (V7 新功能) 列式分析快照
+# 将 StudentInfo / Major / AuditLog 物化为 NumPy 数组，存放在 instance 文件夹，
+# 报表类聚合查询直接在快照上做向量化计算，不再访问主数据库。
+# 快照只由 `flask refresh-analytics` (定时任务) 生成，请求路径只读取。
+
+# 按快照路径缓存: {path: (mtime, data)}
+_cache = {}
+
+
+def snapshot_path():
+    """快照文件路径 (默认位于 instance 文件夹)"""
+    return current_app.config.get('ANALYTICS_SNAPSHOT_PATH') or \
+        os.path.join(current_app.instance_path, 'analytics_snapshot.npz')
+
+
+def _read_tables():
+    """在同一个只读事务中读取所有表，保证快照内部一致"""
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        engine = engine.execution_options(isolation_level='REPEATABLE READ')
+    with engine.connect() as conn:
+        with conn.begin():
+            if conn.dialect.name == 'sqlite':
+                # pysqlite 不会为 SELECT 自动开启事务，需手动 BEGIN
+                conn.exec_driver_sql('BEGIN')
+            majors = conn.execute(
+                select(Major.id, Major.major_name).order_by(Major.id)
+            ).all()
+            students = conn.execute(select(StudentInfo.major_id)).all()
+            logs = conn.execute(
+                select(AuditLog.user_id, AuditLog.action, AuditLog.timestamp)
+            ).all()
+            users = conn.execute(select(User.id, User.username)).all()
+    return majors, students, logs, users
+
+
+def _current_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def build_snapshot():
+    """从数据库读取各表，写入列式快照文件，返回快照路径"""
+    majors, students, logs, users = _read_tables()
+
+    # 动作名称做字典编码：日志表中只保存整数编码
+    action_names, action_codes = np.unique(
+        np.array([log[1] for log in logs], dtype=str), return_inverse=True
+    )
+
+    path = snapshot_path()
+    # 每个写入方使用独立的临时文件，写完后原子替换，
+    # 避免读取方看到写了一半的文件
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.npz.tmp')
+    try:
+        # mkstemp 固定使用 0600，改为普通 open() 的权限，
+        # 以便定时任务与 Web 进程以不同用户运行时仍可读取
+        os.chmod(tmp_path, 0o666 & ~_current_umask())
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(
+                f,
+                major_ids=np.array([m[0] for m in majors], dtype=np.int64),
+                major_names=np.array([m[1] for m in majors], dtype=str),
+                student_major_ids=np.array([s[0] for s in students], dtype=np.int64),
+                user_ids=np.array([u[0] for u in users], dtype=np.int64),
+                user_names=np.array([u[1] for u in users], dtype=str),
+                log_user_ids=np.array([log[0] if log[0] is not None else -1 for log in logs], dtype=np.int64),
+                log_action_codes=action_codes.astype(np.int32),
+                action_names=action_names,
+                log_timestamps=np.array([log[2] for log in logs], dtype='datetime64[s]'),
+                built_at=np.array(time.time()),
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def load_snapshot():
+    """
+    读取快照 (按路径和文件修改时间缓存)。
+    不会访问数据库：快照即使过期也直接返回。快照不存在时返回 None；
+    快照无法读取 (权限、文件损坏等) 时返回上一次缓存的快照，没有则返回 None。
+    """
+    path = snapshot_path()
+    cached = _cache.get(path)
+    try:
+        mtime = os.path.getmtime(path)
+        if cached is None or cached[0] != mtime:
+            with np.load(path) as npz:
+                cached = (mtime, {key: npz[key] for key in npz.files})
+            _cache[path] = cached
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, zipfile.BadZipFile, zlib.error) as e:
+        current_app.logger.warning(f"无法读取分析快照 {path}: {e}")
+    return cached[1] if cached is not None else None
+
+
+def students_by_major(snap):
+    """各专业学生人数 (包含人数为 0 的专业，找不到专业的学生计入 '未知专业')"""
+    major_ids = snap['major_ids']
+    student_major_ids = snap['student_major_ids']
+    labels = snap['major_names'].tolist()
+    if len(major_ids) == 0:
+        matched = np.zeros(len(student_major_ids), dtype=bool)
+        counts = np.zeros(0, dtype=np.int64)
+    else:
+        # major_ids 已排序，searchsorted 将外键映射为专业下标，再校验是否真正匹配
+        idx = np.searchsorted(major_ids, student_major_ids)
+        idx = np.minimum(idx, len(major_ids) - 1)
+        matched = major_ids[idx] == student_major_ids
+        counts = np.bincount(idx[matched], minlength=len(major_ids))
+    data = counts.tolist()
+    unmatched = int(np.count_nonzero(~matched))
+    if unmatched:
+        labels.append('未知专业')
+        data.append(unmatched)
+    return labels, data
+
+
+def audit_counts(snap, by='action'):
+    """审计日志按动作或用户分组计数，按数量降序"""
+    if by == 'user':
+        user_ids, counts = np.unique(snap['log_user_ids'], return_counts=True)
+        names = dict(zip(snap['user_ids'].tolist(), snap['user_names'].tolist()))
+        labels = [names.get(uid, '未知用户') for uid in user_ids.tolist()]
+    else:
+        counts = np.bincount(snap['log_action_codes'], minlength=len(snap['action_names']))
+        labels = snap['action_names'].tolist()
+    order = np.argsort(-np.asarray(counts), kind='stable')
+    return [labels[i] for i in order], np.asarray(counts)[order].tolist()
+
+
+def audit_timeline(snap, days=30, action=None):
+    """快照生成时刻往前 days 天内每日审计日志数量 (UTC)，可按动作过滤"""
+    timestamps = snap['log_timestamps']
+    if action is not None:
+        matches = np.flatnonzero(snap['action_names'] == action)
+        if len(matches) == 0:
+            timestamps = timestamps[:0]
+        else:
+            timestamps = timestamps[snap['log_action_codes'] == matches[0]]
+
+    # 丢弃缺失的时间戳 (NaT)
+    timestamps = timestamps[~np.isnat(timestamps)]
+    end = np.datetime64(int(snap['built_at']), 's').astype('datetime64[D]')
+    start = end - np.timedelta64(days - 1, 'D')
+    offsets = (timestamps.astype('datetime64[D]') - start).astype(np.int64)
+    offsets = offsets[(offsets >= 0) & (offsets < days)]
+    counts = np.bincount(offsets, minlength=days)
+    labels = np.arange(start, end + np.timedelta64(1, 'D')).astype(str).tolist()
+    return labels, counts.tolist()
@@ -44,4 +44,14 @@ def init_db_command():
     else:
         click.echo('用户数据已存在。')
     
-    click.echo('数据库初始化完成！')
\ No newline at end of file
+    click.echo('数据库初始化完成！')
+
+
+# (V7 新功能) 可由定时任务 (cron) 周期性调用
+@click.command('refresh-analytics')
+@with_appcontext
+def refresh_analytics_command():
+    """重新生成列式分析快照。"""
+    from .analytics import build_snapshot
+    path = build_snapshot()
+    click.echo(f'分析快照已生成: {path}')
@@ -87,6 +87,40 @@ def dashboard_data():
     data = [data[1] for data in majors_data]
     return jsonify({'labels': labels, 'data': data})
 
+# (V7 新功能) 分析 API: 只读取列式快照 (可能已过期)，不查询主数据库。
+# 快照由 `flask refresh-analytics` 定时生成；analytics 依赖 numpy，延迟导入，
+# 以免缺少 numpy 时整个站点无法启动。
+def _analytics_response(aggregate, **kwargs):
+    from .. import analytics
+    snap = analytics.load_snapshot()
+    if snap is None:
+        return jsonify({'error': "分析快照尚未生成，请运行 'flask refresh-analytics'。"}), 503
+    labels, data = getattr(analytics, aggregate)(snap, **kwargs)
+    return jsonify({'labels': labels, 'data': data, 'built_at': float(snap['built_at'])})
+
+@main.route("/analytics/students-by-major")
+@login_required
+def analytics_students_by_major():
+    return _analytics_response('students_by_major')
+
+@main.route("/analytics/audit-activity")
+@admin_required
+def analytics_audit_activity():
+    """审计日志分组计数，?by=action (默认) 或 ?by=user"""
+    by = request.args.get('by', 'action')
+    if by not in ('action', 'user'):
+        return jsonify({'error': "参数 by 只能是 'action' 或 'user'"}), 400
+    return _analytics_response('audit_counts', by=by)
+
+@main.route("/analytics/audit-timeline")
+@admin_required
+def analytics_audit_timeline():
+    """最近 N 天每日审计日志数量，?days=30&action=Create Student"""
+    days = request.args.get('days', 30, type=int)
+    days = max(1, min(days, 366))
+    action = request.args.get('action') or None
+    return _analytics_response('audit_timeline', days=days, action=action)
+
 # (V5) 学生 CRUD (V6 升级: 添加日志)
 @main.route("/new-student", methods=['GET', 'POST'])
 @admin_required
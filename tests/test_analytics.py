@@ -0,0 +1,199 @@
+import os
+
+import numpy as np
+import pytest
+
+from app import create_app, db
+from app import analytics
+from app.models import User
+from config import Config
+
+
+def make_snapshot(**overrides):
+    snap = {
+        'major_ids': np.array([1, 3, 7], dtype=np.int64),
+        'major_names': np.array(['软件工程', '数据科学', '法学']),
+        'student_major_ids': np.array([], dtype=np.int64),
+        'user_ids': np.array([1, 2], dtype=np.int64),
+        'user_names': np.array(['constantine', 'guest']),
+        'log_user_ids': np.array([], dtype=np.int64),
+        'log_action_codes': np.array([], dtype=np.int32),
+        'action_names': np.array([], dtype=str),
+        'log_timestamps': np.array([], dtype='datetime64[s]'),
+        'built_at': np.array(float(np.datetime64('2026-01-10T12:00:00', 's').astype(np.int64))),
+    }
+    snap.update(overrides)
+    return snap
+
+
+def test_students_by_major_counts_unknown_major_separately():
+    snap = make_snapshot(student_major_ids=np.array([3, 1, 3, 5, 9, 7], dtype=np.int64))
+    labels, data = analytics.students_by_major(snap)
+    assert labels == ['软件工程', '数据科学', '法学', '未知专业']
+    assert data == [1, 2, 1, 2]
+
+    labels, data = analytics.students_by_major(make_snapshot(
+        major_ids=np.array([], dtype=np.int64),
+        major_names=np.array([], dtype=str),
+        student_major_ids=np.array([4], dtype=np.int64),
+    ))
+    assert labels == ['未知专业']
+    assert data == [1]
+
+
+def test_audit_counts_by_action_and_user():
+    names, codes = np.unique(
+        np.array(['Edit Student', 'Create Student', 'Edit Student']), return_inverse=True
+    )
+    snap = make_snapshot(
+        action_names=names,
+        log_action_codes=codes.astype(np.int32),
+        log_user_ids=np.array([1, -1, 1], dtype=np.int64),
+    )
+    assert analytics.audit_counts(snap, by='action') == (['Edit Student', 'Create Student'], [2, 1])
+    assert analytics.audit_counts(snap, by='user') == (['constantine', '未知用户'], [2, 1])
+    assert analytics.audit_counts(make_snapshot(), by='action') == ([], [])
+
+
+def test_audit_timeline_window_filter_and_nat():
+    names = np.array(['Create Student', 'Delete Student'])
+    snap = make_snapshot(
+        action_names=names,
+        log_action_codes=np.array([0, 0, 1, 0, 0], dtype=np.int32),
+        log_timestamps=np.array([
+            '2026-01-07T23:59:59',  # 窗口之前
+            '2026-01-08T00:00:00',
+            '2026-01-10T23:00:00',
+            '2026-01-11T00:00:00',  # 窗口之后
+            'NaT',
+        ], dtype='datetime64[s]'),
+    )
+    labels, data = analytics.audit_timeline(snap, days=3)
+    assert labels == ['2026-01-08', '2026-01-09', '2026-01-10']
+    assert data == [1, 0, 1]
+
+    assert analytics.audit_timeline(snap, days=3, action='Create Student')[1] == [1, 0, 0]
+    assert analytics.audit_timeline(snap, days=3, action='Missing')[1] == [0, 0, 0]
+    assert analytics.audit_timeline(snap, days=1)[0] == ['2026-01-10']
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        WTF_CSRF_ENABLED = False
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        ANALYTICS_SNAPSHOT_PATH = str(tmp_path / 'analytics_snapshot.npz')
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def test_build_snapshot_from_empty_db(app, tmp_path):
+    assert analytics.load_snapshot() is None
+
+    path = analytics.build_snapshot()
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == '.tmp'] == []
+
+    snap = analytics.load_snapshot()
+    assert snap is not None
+    assert analytics.snapshot_path() == path
+    assert analytics.students_by_major(snap) == ([], [])
+    assert analytics.audit_counts(snap, by='user') == ([], [])
+    assert analytics.audit_timeline(snap, days=2)[1] == [0, 0]
+
+
+def test_snapshot_uses_umask_permissions(app):
+    umask = os.umask(0o022)
+    try:
+        path = analytics.build_snapshot()
+    finally:
+        os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o644
+
+
+def test_load_snapshot_ignores_corrupt_file(app):
+    path = analytics.snapshot_path()
+    with open(path, 'wb') as f:
+        f.write(b'not a snapshot')
+    assert analytics.load_snapshot() is None
+
+    analytics.build_snapshot()
+    snap = analytics.load_snapshot()
+    with open(path, 'wb') as f:
+        f.write(b'PK\x03\x04truncated')
+    # 读取失败时退回上一次缓存的快照
+    assert analytics.load_snapshot() is snap
+
+
+@pytest.fixture
+def client(app):
+    admin = User(username='admin', role='admin')
+    admin.set_password('secret')
+    guest = User(username='guest', role='guest')
+    guest.set_password('secret')
+    db.session.add_all([admin, guest])
+    db.session.commit()
+    return app.test_client()
+
+
+def login(client, username):
+    user_id = User.query.filter_by(username=username).first().id
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+
+def test_analytics_routes_return_503_without_snapshot(client):
+    login(client, 'admin')
+    for url in ('/analytics/students-by-major', '/analytics/audit-activity',
+                '/analytics/audit-timeline'):
+        resp = client.get(url)
+        assert resp.status_code == 503
+        assert 'error' in resp.get_json()
+
+
+def test_analytics_routes_serve_snapshot(client):
+    analytics.build_snapshot()
+    login(client, 'admin')
+
+    resp = client.get('/analytics/students-by-major')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['labels'] == [] and body['data'] == []
+    assert isinstance(body['built_at'], float)
+
+    body = client.get('/analytics/audit-activity?by=user').get_json()
+    assert set(body) == {'labels', 'data', 'built_at'}
+    assert client.get('/analytics/audit-activity?by=foo').status_code == 400
+
+
+def test_audit_timeline_clamps_days(client):
+    analytics.build_snapshot()
+    login(client, 'admin')
+
+    def n_days(query):
+        return len(client.get('/analytics/audit-timeline' + query).get_json()['labels'])
+
+    assert n_days('') == 30
+    assert n_days('?days=0') == 1
+    assert n_days('?days=-5') == 1
+    assert n_days('?days=1000') == 366
+    assert n_days('?days=abc') == 30
+
+
+def test_audit_analytics_require_admin(client):
+    analytics.build_snapshot()
+
+    # 未登录: 重定向到登录页
+    resp = client.get('/analytics/students-by-major')
+    assert resp.status_code == 302
+
+    login(client, 'guest')
+    assert client.get('/analytics/students-by-major').status_code == 200
+    for url in ('/analytics/audit-activity', '/analytics/audit-timeline'):
+        resp = client.get(url)
+        assert resp.status_code == 302
+        assert resp.headers['Location'].endswith('/')